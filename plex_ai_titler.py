@@ -6,22 +6,40 @@ Connects to a Plex server and uses an LLM to generate titles for media items
 with unlocked title fields based on their filenames.
 """
 
+from __future__ import annotations
+
 import argparse
+import asyncio
+import hashlib
 import json
+import logging
 import os
+import re
+import sqlite3
 import sys
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from getpass import getpass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+# Third-party modules are slow to import, so they are imported where they are
+# used; --help, --version, and config errors don't pay for them
+if TYPE_CHECKING:
+    import requests
+    from openai import AsyncOpenAI
+    from plexapi.library import LibrarySection
+    from plexapi.myplex import MyPlexAccount
+    from plexapi.server import PlexServer
 
-import yaml
-from openai import OpenAI
-from plexapi import CONFIG
-from plexapi.exceptions import Unauthorized
-from plexapi.library import LibrarySection
-from plexapi.myplex import MyPlexAccount
-from plexapi.server import PlexServer
+# orjson is optional; it is faster than the stdlib json module when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+log = logging.getLogger("plex_ai_titler")
 
 # Version is injected at build time by the Dockerfile
 VERSION = "<dev>"
@@ -31,6 +49,85 @@ CREDS_FILE = Path(
     os.environ.get("PLEX_CREDS_FILE", Path(__file__).parent / ".creds.json")
 )
 
+# Pending OpenAI batch jobs, stored alongside the credentials file so an
+# interrupted --batch run can resume polling instead of re-submitting
+BATCH_FILE = CREDS_FILE.parent / ".batch.json"
+
+# Seconds to wait between OpenAI batch status checks
+BATCH_POLL_INTERVAL = 30
+
+# OpenAI Batch API limits on the requests and input file size of one job
+BATCH_MAX_REQUESTS = 50_000
+BATCH_MAX_BYTES = 200_000_000
+
+# Cache of previously generated titles, stored alongside the credentials file
+TITLE_CACHE_FILE = CREDS_FILE.parent / "titles.db"
+
+# On-disk cache of LLM responses, keyed by model, system prompt, and filename
+RESPONSE_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "plex-ai-titler"
+)
+
+# Number of title cache writes per transaction
+TITLE_CACHE_COMMIT_INTERVAL = 500
+
+# Number of library items fetched from Plex per request
+LIBRARY_PAGE_SIZE = 200
+
+# XML elements and attributes Plex can omit from library listings; we only
+# need each item's title, locked fields, and media part file paths
+LIBRARY_EXCLUDE_ELEMENTS = (
+    "Genre,Country,Guid,Rating,Collection,Director,Writer,Role,Producer,"
+    "Similar,Style,Mood,Format,Label,Image,UltraBlurColors"
+)
+LIBRARY_EXCLUDE_FIELDS = "summary,tagline"
+
+# Order library pages by fields that editing a title doesn't change, so items
+# don't move between pages while earlier ones are being retitled
+LIBRARY_SORT = "addedAt:asc,id:asc"
+
+# Response format used when structured_output is enabled: a JSON object with
+# a single title field
+TITLE_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "title",
+        "schema": {
+            "type": "object",
+            "properties": {"title": {"type": "string", "maxLength": 200}},
+            "required": ["title"],
+        },
+    },
+}
+
+# Parts of a file path that carry no title information: video file extensions,
+# bracketed tags (usually release groups or video IDs), and release tags
+FILENAME_NOISE_RE = re.compile(
+    r"\.(?:mkv|mp4|avi|m4v|mov|webm|wmv)$"
+    r"|\[[^\]]+\]"
+    r"|[._-]?\b(?:1080p|720p|2160p|4K|WEB-DL|BluRay|x26[45]|HEVC|DDP?5\.1|HDR)\b",
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Appended to the system prompt when several filenames are sent in one request
+DEFAULT_MULTI_TITLE_PROMPT = """\
+You will be given a numbered list of file paths, one per line. Generate a \
+title for each of them as described above. Respond with only a JSON array \
+containing one object per file path, of the form \
+{"i": <number of the file path>, "title": "<title>"}, with no other text or \
+formatting."""
+
+# Number of title updates buffered before they are applied to Plex, and the
+# maximum number of items updated by a single multi-edit request
+EDIT_BATCH_SIZE = 100
+
+# Maximum number of items waiting between pipeline stages
+PIPELINE_QUEUE_SIZE = 64
+
+# Maximum number of generated titles memoized in-process
+TITLE_MEMO_SIZE = 4096
+
 # Default config file path
 DEFAULT_CONFIG_FILE = Path(__file__).parent / "config.yaml"
 
@@ -44,6 +141,61 @@ class AIConfig:
     system_prompt: str
     temperature: float = 0.0
     api_key: str = ""
+    max_concurrency: int = 8
+    max_retries: int = 5
+    max_completion_tokens: int | None = None
+    structured_output: bool = False
+    multi_title_prompt: str = ""
+    cache_ttl_seconds: int | None = None
+
+
+@dataclass
+class ProcessStats:
+    """Counters reported in the summary after processing a library."""
+
+    found: int = 0
+    processed: int = 0
+    skipped_locked: int = 0
+    skipped_no_file: int = 0
+    cached: int = 0
+    errors: int = 0
+
+
+class UnflushedStreamHandler(logging.StreamHandler):
+    """A StreamHandler that leaves flushing to the underlying stream.
+
+    Warnings, errors, and records logged with extra={"flush": True} are
+    still flushed immediately.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        if record.levelno >= logging.WARNING or getattr(record, "flush", False):
+            super().flush()
+
+    def flush(self) -> None:
+        pass
+
+
+def configure_logging() -> None:
+    """Send log records to stdout, block-buffered when it is not a terminal.
+
+    Progress is logged for every item, and flushing each line is slow when
+    output is piped (e.g. Docker without a TTY). Warnings, errors, and status
+    lines followed by a long wait, such as batch polling, are still flushed.
+    Log records and print() share sys.stdout, so their relative order is
+    preserved either way.
+    """
+    if sys.stdout.isatty():
+        handler = logging.StreamHandler(sys.stdout)
+    else:
+        sys.stdout.reconfigure(line_buffering=False, write_through=False)
+        handler = UnflushedStreamHandler(sys.stdout)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[handler])
+
+    # httpx logs every request at INFO; keep the OpenAI client's retry
+    # messages, but not that
+    logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 def load_config(config_path: Path) -> AIConfig:
@@ -52,8 +204,16 @@ def load_config(config_path: Path) -> AIConfig:
         print(f"Error: Config file not found: {config_path}")
         sys.exit(1)
 
+    import yaml
+
+    # Prefer the libyaml-backed loader when PyYAML was built with it
+    try:
+        from yaml import CSafeLoader as YAMLLoader
+    except ImportError:
+        from yaml import SafeLoader as YAMLLoader
+
     with open(config_path) as f:
-        data = yaml.safe_load(f)
+        data = yaml.load(f, Loader=YAMLLoader)
 
     ai_config = data.get("ai", {})
 
@@ -66,12 +226,90 @@ def load_config(config_path: Path) -> AIConfig:
         system_prompt=ai_config.get("system_prompt", ""),
         temperature=ai_config.get("temperature", 0.0),
         api_key=api_key,
+        max_concurrency=ai_config.get("max_concurrency") or 8,
+        max_retries=ai_config.get("max_retries", 5),
+        max_completion_tokens=ai_config.get("max_completion_tokens"),
+        structured_output=ai_config.get("structured_output", False),
+        multi_title_prompt=ai_config.get(
+            "multi_title_prompt", DEFAULT_MULTI_TITLE_PROMPT
+        ),
+        cache_ttl_seconds=ai_config.get("cache_ttl_seconds"),
+    )
+
+
+def create_openai_client(config: AIConfig) -> AsyncOpenAI:
+    """Create an OpenAI client whose connections are kept alive and reused.
+
+    Requests share HTTP/2 connections where the endpoint supports it, and the
+    pool is sized for config.max_concurrency simultaneous requests.
+
+    Rate-limited (429), server error, timed-out, and failed-connection
+    requests are retried up to config.max_retries times by the client, with
+    jittered exponential backoff that honors Retry-After headers.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=config.max_concurrency * 2,
+            max_keepalive_connections=config.max_concurrency,
+        ),
+    )
+    return AsyncOpenAI(
+        base_url=config.endpoint,
+        api_key=config.api_key,
+        max_retries=config.max_retries,
+        http_client=http_client,
     )
 
 
+def create_plex_session() -> requests.Session:
+    """Create the HTTP session shared by Plex.tv and Plex server requests.
+
+    Connections are pooled for the concurrent pipeline stages, and requests
+    that fail after connecting are retried with backoff. Connection failures
+    are not retried, so probing an unreachable server address while choosing
+    a connection fails after a single timeout.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, connect=0, backoff_factor=0.25),
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def connect_direct(url: str, token: str) -> PlexServer:
     """Connect directly to a Plex server using URL and token."""
-    return PlexServer(url, token)
+    from plexapi.server import PlexServer
+
+    return PlexServer(url, token, session=create_plex_session())
+
+
+def read_json_file(path: Path) -> Any:
+    """Read and parse a JSON file, using orjson if it is installed."""
+    if orjson:
+        return orjson.loads(path.read_bytes())
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_json_file(path: Path, data: Any) -> None:
+    """Serialize data to a JSON file, using orjson if it is installed."""
+    if orjson:
+        path.write_bytes(orjson.dumps(data))
+        return
+    with open(path, "w") as f:
+        json.dump(data, f)
 
 
 def load_cached_token() -> str | None:
@@ -79,9 +317,7 @@ def load_cached_token() -> str | None:
     if not CREDS_FILE.exists():
         return None
     try:
-        with open(CREDS_FILE) as f:
-            data = json.load(f)
-            return data.get("auth_token")
+        return read_json_file(CREDS_FILE).get("auth_token")
     except (json.JSONDecodeError, OSError):
         return None
 
@@ -89,8 +325,7 @@ def load_cached_token() -> str | None:
 def save_cached_token(token: str) -> None:
     """Save auth token to credentials file."""
     try:
-        with open(CREDS_FILE, "w") as f:
-            json.dump({"auth_token": token}, f)
+        write_json_file(CREDS_FILE, {"auth_token": token})
         # Set restrictive permissions (owner read/write only)
         CREDS_FILE.chmod(0o600)
     except OSError as e:
@@ -105,17 +340,170 @@ def clear_cached_token() -> None:
         pass
 
 
+def batch_config_key(config: AIConfig) -> str:
+    """Hash the model and system prompt a batch job was submitted with."""
+    source = f"{config.model}\n{config.system_prompt}"
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+def load_pending_batch(library_key: int, config: AIConfig) -> list[str]:
+    """Load the IDs of pending OpenAI batch jobs for the given library.
+
+    Batches submitted with a different model or system prompt are ignored, so
+    their output is never applied or cached under the current settings.
+    """
+    if not BATCH_FILE.exists():
+        return []
+    try:
+        data = read_json_file(BATCH_FILE)
+    except (json.JSONDecodeError, OSError):
+        return []
+    if data.get("library_key") != library_key:
+        return []
+    if data.get("config_sha1") != batch_config_key(config):
+        log.info(
+            "Ignoring pending batches submitted with a different model or "
+            "system prompt",
+            extra={"flush": True},
+        )
+        return []
+    return data.get("batch_ids", [])
+
+
+def save_pending_batch(
+    batch_ids: list[str], library_key: int, config: AIConfig
+) -> None:
+    """Save the IDs of submitted OpenAI batch jobs."""
+    try:
+        write_json_file(
+            BATCH_FILE,
+            {
+                "batch_ids": batch_ids,
+                "library_key": library_key,
+                "config_sha1": batch_config_key(config),
+            },
+        )
+    except OSError as e:
+        log.warning(f"Warning: Could not save batch IDs: {e}")
+
+
+def clear_pending_batch() -> None:
+    """Remove the pending batch job file."""
+    try:
+        BATCH_FILE.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def open_title_cache() -> sqlite3.Connection | None:
+    """Open (creating if necessary) the generated title cache database."""
+    try:
+        conn = sqlite3.connect(TITLE_CACHE_FILE)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS titles ("
+            "rating_key INTEGER PRIMARY KEY, source_sha1 BLOB, title TEXT, ts INTEGER)"
+        )
+        conn.commit()
+        return conn
+    except sqlite3.Error as e:
+        log.warning(f"Warning: Could not open title cache: {e}")
+        return None
+
+
+def title_cache_key(config: AIConfig, relative_path: str) -> bytes:
+    """Hash the inputs that determine a generated title.
+
+    Includes the model and system prompt so that changing either invalidates
+    previously cached titles.
+    """
+    source = f"{config.model}\n{config.system_prompt}\n{relative_path}"
+    return hashlib.sha1(source.encode()).digest()
+
+
+def load_cached_title(
+    conn: sqlite3.Connection, rating_key: int, source_sha1: bytes
+) -> str | None:
+    """Look up a previously generated title for a media item."""
+    row = conn.execute(
+        "SELECT title FROM titles WHERE rating_key = ? AND source_sha1 = ?",
+        (rating_key, source_sha1),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def save_cached_title(
+    conn: sqlite3.Connection, rating_key: int, source_sha1: bytes, title: str
+) -> None:
+    """Store a generated title for a media item.
+
+    Writes are left in an open transaction; the caller commits periodically.
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO titles (rating_key, source_sha1, title, ts) "
+        "VALUES (?, ?, ?, ?)",
+        (rating_key, source_sha1, title, int(time.time())),
+    )
+
+
+def response_cache_path(config: AIConfig, filename: str) -> Path:
+    """Get the response cache file for a filename under the current model/prompt.
+
+    Files are sharded into subdirectories by the first two hex digits of the
+    key, to avoid one huge directory.
+    """
+    source = f"{config.model}\n{config.system_prompt}\n{filename}"
+    key = hashlib.sha256(source.encode()).hexdigest()
+    return RESPONSE_CACHE_DIR / key[:2] / key[2:]
+
+
+def load_cached_response(config: AIConfig, filename: str) -> str | None:
+    """Load a cached LLM title for a filename, unless missing or expired."""
+    path = response_cache_path(config, filename)
+    try:
+        if (
+            config.cache_ttl_seconds
+            and time.time() - path.stat().st_mtime > config.cache_ttl_seconds
+        ):
+            return None
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def save_cached_response(config: AIConfig, filename: str, title: str) -> None:
+    """Cache an LLM title for a filename.
+
+    Writes to a temporary file first and renames it into place, so readers
+    never see a partial entry.
+    """
+    path = response_cache_path(config, filename)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(title, encoding="utf-8")
+        tmp.replace(path)
+    except OSError as e:
+        log.warning(f"Warning: Could not cache LLM response: {e}")
+
+
 def authenticate_myplex(username: str | None, password: str | None) -> MyPlexAccount:
     """Authenticate with MyPlex and return the account.
 
     Tries cached token first, falls back to username/password authentication.
+    Servers connected to through the account share its HTTP session.
     """
+    from plexapi import CONFIG
+    from plexapi.exceptions import Unauthorized
+    from plexapi.myplex import MyPlexAccount
+
+    session = create_plex_session()
+
     # Try cached token first
     cached_token = load_cached_token()
     if cached_token:
         try:
             print("Using cached credentials...")
-            account = MyPlexAccount(token=cached_token)
+            account = MyPlexAccount(token=cached_token, session=session)
             return account
         except Unauthorized:
             print("Cached credentials expired, re-authenticating...")
@@ -135,11 +523,11 @@ def authenticate_myplex(username: str | None, password: str | None) -> MyPlexAcc
     print(f"Authenticating with Plex.tv as {username}...")
 
     try:
-        account = MyPlexAccount(username, password)
+        account = MyPlexAccount(username, password, session=session)
     except Unauthorized as e:
         if "verification code" in str(e).lower() or "1029" in str(e):
             code = input("2FA verification code: ").strip()
-            account = MyPlexAccount(username, password, code=code)
+            account = MyPlexAccount(username, password, code=code, session=session)
         else:
             raise
 
@@ -209,27 +597,91 @@ def select_library(plex: PlexServer, prompt: str) -> LibrarySection:
             sys.exit(0)
 
 
-def get_item_filepaths(item: Any) -> list[str]:
-    """Get the list of full file paths for a media item."""
-    filepaths = []
+def fetch_library_page(library: LibrarySection, offset: int) -> list[Any]:
+    """Fetch one page of items in a library from Plex, starting at offset.
+
+    Requests a trimmed listing that leaves out metadata this tool never reads,
+    in LIBRARY_SORT order. A page shorter than LIBRARY_PAGE_SIZE is the last
+    one.
+    """
+    from plexapi import utils
+
+    page = library.fetchItems(
+        f"/library/sections/{library.key}/all",
+        container_start=offset,
+        container_size=LIBRARY_PAGE_SIZE,
+        maxresults=LIBRARY_PAGE_SIZE,
+        params={
+            "type": utils.searchType(library.TYPE),
+            "sort": LIBRARY_SORT,
+            "includeGuids": 0,
+            "excludeElements": LIBRARY_EXCLUDE_ELEMENTS,
+            "excludeFields": LIBRARY_EXCLUDE_FIELDS,
+        },
+    )
+    for item in page:
+        # Library listings include locked fields and media parts, so an
+        # empty value there is authoritative. Without this, plexapi
+        # re-fetches the full item the first time we read one (e.g. the
+        # fields of every unlocked item).
+        item._autoReload = False
+    return page
+
+
+def get_first_filepath(item: Any) -> str | None:
+    """Get the full file path of a media item's first part, if it has one."""
     if hasattr(item, "iterParts"):
         for part in item.iterParts():
             if part and part.file:
-                filepaths.append(part.file)
-    return filepaths
+                return part.file
+    return None
+
+
+def classify_item(
+    item: Any, location_prefixes: list[tuple[str, int]]
+) -> tuple[Any, str | None, bool]:
+    """Inspect a media item to decide whether it needs a title.
+
+    Returns (item, relative_path, locked). relative_path is that of the item's
+    first file, or None if it has no file; locked is only checked for items
+    with a file.
+    """
+    filepath = get_first_filepath(item)
+    if not filepath:
+        return item, None, False
+    return item, get_relative_path(filepath, location_prefixes), is_title_locked(item)
+
+
+def fetch_classified_page(
+    library: LibrarySection, offset: int, location_prefixes: list[tuple[str, int]]
+) -> list[tuple[Any, str | None, bool]]:
+    """Fetch one page of library items and classify each with classify_item()."""
+    return [
+        classify_item(item, location_prefixes)
+        for item in fetch_library_page(library, offset)
+    ]
+
 
+def build_location_prefixes(library_locations: list[str]) -> list[tuple[str, int]]:
+    """Build (prefix, length) pairs for matching paths against library roots.
 
-def get_relative_path(filepath: str, library_locations: list[str]) -> str:
+    Each prefix ends with a separator for proper prefix matching. Prefixes are
+    sorted longest-first so that nested library locations match first.
+    """
+    prefixes = {location.rstrip(os.sep) + os.sep for location in library_locations}
+    return sorted(((prefix, len(prefix)) for prefix in prefixes), key=lambda p: -p[1])
+
+
+def get_relative_path(filepath: str, location_prefixes: list[tuple[str, int]]) -> str:
     """Get the path relative to the library root folder.
 
-    If the file is under one of the library locations, returns the relative path.
-    Otherwise, returns just the basename.
+    location_prefixes comes from build_location_prefixes(). If the file is under
+    one of the library locations, returns the relative path. Otherwise, returns
+    just the basename.
     """
-    for location in library_locations:
-        # Ensure location ends with separator for proper prefix matching
-        location_prefix = location.rstrip(os.sep) + os.sep
-        if filepath.startswith(location_prefix):
-            return filepath[len(location_prefix) :]
+    for prefix, length in location_prefixes:
+        if filepath.startswith(prefix):
+            return filepath[length:]
 
     # Fallback to basename if not under any library location
     return os.path.basename(filepath)
@@ -237,89 +689,659 @@ def get_relative_path(filepath: str, library_locations: list[str]) -> str:
 
 def is_title_locked(item: Any) -> bool:
     """Check if the title field is locked for a media item."""
-    if not hasattr(item, "fields") or not item.fields:
-        return False
+    fields = getattr(item, "fields", None) or ()
+    return any(field.name == "title" and field.locked for field in fields)
+
 
-    for field in item.fields:
-        if field.name == "title" and field.locked:
-            return True
+def apply_title_edits(
+    library: LibrarySection, edits: list[tuple[Any, str]]
+) -> list[tuple[Any, Exception]]:
+    """Apply title updates to Plex, returning (item, error) for each failure.
+
+    Plex's multi-edit endpoint sets one value on many items, so items that
+    share a new title (e.g. multiple versions of one movie) are updated with a
+    single request. Other items, and any multi-edit that fails, fall back to a
+    per-item update.
+    """
+    by_title: dict[str, list[Any]] = {}
+    for item, title in edits:
+        by_title.setdefault(title, []).append(item)
+
+    failures = []
+    for title, items in by_title.items():
+        if len(items) > 1:
+            try:
+                library.multiEdit(items, **{"title.value": title, "title.locked": 1})
+                continue
+            except Exception as e:
+                log.warning(
+                    f"Warning: Multi-edit failed, updating items one by one: {e}"
+                )
 
-    return False
+        for item in items:
+            try:
+                item.editTitle(title)
+            except Exception as e:
+                failures.append((item, e))
 
+    return failures
 
-def generate_title(client: OpenAI, config: AIConfig, filename: str) -> str:
-    """Use the LLM to generate a title from a filename."""
-    response = client.chat.completions.create(
-        model=config.model,
-        temperature=config.temperature,
-        messages=[
+
+def clean_filename(filename: str) -> str:
+    """Strip extensions and release tags from a file path before prompting.
+
+    These inflate prompt tokens and can confuse the model; directory names and
+    years are kept since they help it work out the title.
+    """
+    return WHITESPACE_RE.sub(" ", FILENAME_NOISE_RE.sub(" ", filename)).strip()
+
+
+def build_request(config: AIConfig, filename: str) -> dict[str, Any]:
+    """Build the chat completion parameters used to generate a title."""
+    request: dict[str, Any] = {
+        "model": config.model,
+        "temperature": config.temperature,
+        "messages": [
             {"role": "system", "content": config.system_prompt},
-            {"role": "user", "content": filename},
+            {"role": "user", "content": clean_filename(filename)},
         ],
-    )
+    }
+    if config.max_completion_tokens:
+        request["max_completion_tokens"] = config.max_completion_tokens
+    if config.structured_output:
+        request["response_format"] = TITLE_RESPONSE_FORMAT
+    return request
+
+
+def parse_title(config: AIConfig, content: str | None) -> str:
+    """Extract the generated title from a chat completion's message content."""
+    if not content:
+        raise ValueError("LLM returned an empty response")
+    if config.structured_output:
+        try:
+            content = json.loads(content)["title"]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            raise ValueError(f"LLM returned malformed JSON: {content!r}") from e
+        if not isinstance(content, str):
+            raise ValueError(f"LLM returned a non-string title: {content!r}")
+    return content.strip()
 
-    return response.choices[0].message.content.strip()
 
+# In-process LRU memo of title generation tasks, keyed by
+# (model, system prompt hash, filename)
+_title_memo: OrderedDict[tuple[str, str, str], asyncio.Future[str]] = OrderedDict()
 
-def process_library_items(
-    library: LibrarySection, client: OpenAI, config: AIConfig, dry_run: bool
-) -> None:
-    """Process all items in a library, generating titles for unlocked items."""
-    print(f"\nScanning library: {library.title}...")
-    items = library.all()
-    library_locations = library.locations
 
-    print(f"Found {len(items)} items in '{library.title}'")
-    print("=" * 80)
+def title_memo_key(config: AIConfig, filename: str) -> tuple[str, str, str]:
+    """Key a filename's title in the in-process memo."""
+    prompt_hash = hashlib.sha1(config.system_prompt.encode()).hexdigest()
+    return (config.model, prompt_hash, filename)
 
-    processed = 0
-    skipped_locked = 0
-    skipped_no_file = 0
-    errors = 0
 
-    for item in items:
-        filepaths = get_item_filepaths(item)
+def memoize_title(key: tuple[str, str, str], future: asyncio.Future[str]) -> None:
+    """Add a pending title to the memo, evicting the least recently used."""
+    _title_memo[key] = future
+    if len(_title_memo) > TITLE_MEMO_SIZE:
+        _title_memo.popitem(last=False)
 
-        if not filepaths:
-            skipped_no_file += 1
-            continue
 
-        if is_title_locked(item):
-            skipped_locked += 1
-            print(f"SKIP (locked): {item.title}")
-            continue
+def forget_title(key: tuple[str, str, str], future: asyncio.Future[str]) -> None:
+    """Remove a failed title from the memo so that it can be retried."""
+    if _title_memo.get(key) is future:
+        del _title_memo[key]
 
-        # Use first file's relative path for title generation
-        filepath = filepaths[0]
-        relative_path = get_relative_path(filepath, library_locations)
-        current_title = item.title
 
-        try:
-            new_title = generate_title(client, config, relative_path)
+async def request_title(client: AsyncOpenAI, config: AIConfig, filename: str) -> str:
+    """Get a title for a single filename from the LLM and cache the response."""
+    response = await client.chat.completions.create(**build_request(config, filename))
 
-            if dry_run:
-                print(f"DRY RUN: '{current_title}' -> '{new_title}'")
-                print(f"  Path: {relative_path}")
+    title = parse_title(config, response.choices[0].message.content)
+    save_cached_response(config, filename, title)
+    return title
+
+
+def build_multi_title_request(config: AIConfig, filenames: list[str]) -> dict[str, Any]:
+    """Build the chat completion parameters used to title several files at once."""
+    numbered = "\n".join(
+        f"{i}. {clean_filename(filename)}" for i, filename in enumerate(filenames, 1)
+    )
+    request: dict[str, Any] = {
+        "model": config.model,
+        "temperature": config.temperature,
+        "messages": [
+            {
+                "role": "system",
+                "content": f"{config.system_prompt}\n\n{config.multi_title_prompt}",
+            },
+            {"role": "user", "content": numbered},
+        ],
+    }
+    if config.max_completion_tokens:
+        request["max_completion_tokens"] = config.max_completion_tokens * len(filenames)
+    return request
+
+
+def parse_multi_titles(content: str | None, count: int) -> list[str]:
+    """Extract titles from a response to build_multi_title_request().
+
+    Expects a JSON array of {"i": n, "title": "..."} objects covering every
+    file path, numbered from 1; raises ValueError otherwise.
+    """
+    if not content:
+        raise ValueError("LLM returned an empty response")
+
+    # Tolerate Markdown code fences or other text around the array
+    start, end = content.find("["), content.rfind("]")
+    try:
+        entries = json.loads(content[start : end + 1]) if start != -1 else None
+        titles = {int(entry["i"]): entry["title"] for entry in entries}
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"LLM returned malformed JSON: {content!r}") from e
+
+    result = []
+    for i in range(1, count + 1):
+        title = titles.get(i)
+        if not isinstance(title, str) or not title.strip():
+            raise ValueError(f"LLM response has no title for file {i}: {content!r}")
+        result.append(title.strip())
+    return result
+
+
+async def generate_titles_multi(
+    client: AsyncOpenAI, config: AIConfig, filenames: list[str]
+) -> list[str | Exception]:
+    """Use the LLM to generate titles for several filenames in one request.
+
+    Titles are memoized in-process, so a repeated filename only reaches the LLM
+    once per run, whether it repeats within filenames or across concurrent
+    calls. Failed requests are not memoized. Returns one title or Exception
+    per filename, in order.
+    """
+    loop = asyncio.get_running_loop()
+    pending: dict[str, asyncio.Future[str]] = {}
+    futures = []
+    for filename in filenames:
+        key = title_memo_key(config, filename)
+        future = _title_memo.get(key)
+        if future is None:
+            future = pending[filename] = loop.create_future()
+            memoize_title(key, future)
+        else:
+            _title_memo.move_to_end(key)
+        futures.append(future)
+
+    if pending:
+        try:
+            titles = await request_titles_multi(client, config, list(pending))
+        except BaseException:
+            # Don't leave other callers waiting on titles that will never come
+            for filename, future in pending.items():
+                forget_title(title_memo_key(config, filename), future)
+                future.cancel()
+            raise
+        for (filename, future), title in zip(pending.items(), titles):
+            if isinstance(title, Exception):
+                forget_title(title_memo_key(config, filename), future)
+                future.set_exception(title)
             else:
-                print(f"UPDATE: '{current_title}' -> '{new_title}'")
-                print(f"  Path: {relative_path}")
-                item.editTitle(new_title)
+                future.set_result(title)
+
+    return await asyncio.gather(*futures, return_exceptions=True)
+
+
+async def request_titles_multi(
+    client: AsyncOpenAI, config: AIConfig, filenames: list[str]
+) -> list[str | Exception]:
+    """Ask the LLM for titles for several filenames in one request.
+
+    A malformed response is retried once; if the retry also fails, or the
+    request is rejected with a non-retryable error, each filename is sent in
+    its own request instead. New titles are saved to the response cache;
+    callers check that cache first.
+    """
+    if len(filenames) == 1:
+        try:
+            return [await request_title(client, config, filenames[0])]
+        except Exception as e:
+            return [e]
 
-            processed += 1
+    import openai
 
+    for attempt in range(2):
+        try:
+            response = await client.chat.completions.create(
+                **build_multi_title_request(config, filenames)
+            )
+            titles = parse_multi_titles(
+                response.choices[0].message.content, len(filenames)
+            )
+        except ValueError as e:
+            log.warning(f"Warning: Could not parse titles (attempt {attempt + 1}): {e}")
+        except openai.APIStatusError as e:
+            # The client has already retried rate limits and server errors;
+            # other errors may be caused by a single filename in the request
+            if e.status_code in (408, 409, 429) or e.status_code >= 500:
+                return [e] * len(filenames)
+            log.warning(f"Warning: Multi-title request failed: {e}")
+            break
         except Exception as e:
-            print(f"ERROR: {item.title}: {e}")
-            errors += 1
+            return [e] * len(filenames)
+        else:
+            for filename, title in zip(filenames, titles):
+                save_cached_response(config, filename, title)
+            return titles
+
+    return await asyncio.gather(
+        *(request_title(client, config, filename) for filename in filenames),
+        return_exceptions=True,
+    )
+
 
-    print("=" * 80)
-    print("\nSummary:")
-    print(f"  Processed: {processed}")
-    print(f"  Skipped (locked): {skipped_locked}")
-    print(f"  Skipped (no file): {skipped_no_file}")
-    print(f"  Errors: {errors}")
+def build_batch_inputs(
+    config: AIConfig, candidates: list[tuple[Any, str]]
+) -> list[tuple[bytes, int]]:
+    """Build JSONL batch input files for title requests.
+
+    Requests are split across as many files as needed to stay within the
+    Batch API's per-job limits. Returns (file contents, request count) pairs.
+    """
+    inputs = []
+    lines: list[bytes] = []
+    size = 0
+    for item, relative_path in candidates:
+        line = json.dumps(
+            {
+                "custom_id": str(item.ratingKey),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": build_request(config, relative_path),
+            }
+        ).encode()
+        if lines and (
+            len(lines) == BATCH_MAX_REQUESTS or size + len(line) + 1 > BATCH_MAX_BYTES
+        ):
+            inputs.append((b"\n".join(lines), len(lines)))
+            lines = []
+            size = 0
+        lines.append(line)
+        size += len(line) + 1
+    if lines:
+        inputs.append((b"\n".join(lines), len(lines)))
+    return inputs
+
+
+async def wait_for_batch(client: AsyncOpenAI, batch_id: str) -> Any:
+    """Poll an OpenAI batch job until it completes, returning the batch."""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            return batch
+        if batch.status in ("failed", "expired", "cancelled"):
+            clear_pending_batch()
+            raise RuntimeError(f"Batch {batch_id} ended with status: {batch.status}")
+        log.info(
+            f"Waiting for batch {batch_id} (status: {batch.status})...",
+            extra={"flush": True},
+        )
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+
+async def read_batch_results(
+    client: AsyncOpenAI, config: AIConfig, batch: Any
+) -> dict[str, str | Exception]:
+    """Read the title or error for each request in a completed batch job.
+
+    Successful requests are in the batch's output file and failed ones in its
+    error file. Results are keyed by custom_id (the item's rating key).
+    """
+    titles: dict[str, str | Exception] = {}
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        output = await client.files.content(file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            response = row.get("response") or {}
+            if row.get("error") or response.get("status_code") != 200:
+                error = row.get("error") or (response.get("body") or {}).get("error")
+                titles[row["custom_id"]] = RuntimeError(
+                    f"batch request failed: {error}"
+                )
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            try:
+                titles[row["custom_id"]] = parse_title(config, content)
+            except ValueError as e:
+                titles[row["custom_id"]] = e
+    return titles
+
+
+async def generate_titles_batch(
+    client: AsyncOpenAI,
+    config: AIConfig,
+    library_key: int,
+    candidates: list[tuple[Any, str]],
+) -> list[str | Exception]:
+    """Generate titles for many items at once via the OpenAI Batch API.
+
+    Resumes polling any pending batch jobs for this library, then submits the
+    candidates they didn't cover as new jobs and waits for those to finish.
+    Returns one result per candidate, in order; items without a usable result
+    get an Exception instead.
+    """
+    titles: dict[str, str | Exception] = {}
+
+    batch_ids = load_pending_batch(library_key, config)
+    for batch_id in batch_ids:
+        log.info(f"Resuming pending batch: {batch_id}", extra={"flush": True})
+        batch = await wait_for_batch(client, batch_id)
+        titles.update(await read_batch_results(client, config, batch))
+
+    remaining = [
+        (item, relative_path)
+        for item, relative_path in candidates
+        if str(item.ratingKey) not in titles
+    ]
+    new_batch_ids = []
+    for data, count in build_batch_inputs(config, remaining):
+        batch_input = await client.files.create(
+            file=("batch.jsonl", data), purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_input.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        new_batch_ids.append(batch.id)
+        # Keep the resumed batches too, so their results aren't lost if the
+        # run is interrupted again before the new ones finish
+        save_pending_batch(batch_ids + new_batch_ids, library_key, config)
+        log.info(
+            f"Submitted batch {batch.id} with {count} requests",
+            extra={"flush": True},
+        )
+
+    for batch_id in new_batch_ids:
+        batch = await wait_for_batch(client, batch_id)
+        titles.update(await read_batch_results(client, config, batch))
+
+    clear_pending_batch()
+
+    return [
+        titles.get(str(item.ratingKey), RuntimeError("no result in batch output"))
+        for item, _ in candidates
+    ]
+
+
+async def process_library_items(
+    library: LibrarySection,
+    client: AsyncOpenAI,
+    config: AIConfig,
+    dry_run: bool,
+    batch: bool = False,
+    batch_size: int = 1,
+) -> None:
+    """Process all items in a library, generating titles for unlocked items.
+
+    Runs as a three-stage pipeline joined by bounded queues:
+
+    1. Library pages are fetched and classified in a worker thread, one page
+       ahead of the rest of the pipeline. Items that are locked or have no
+       file are skipped.
+    2. config.max_concurrency workers generate titles with the LLM, sending
+       up to batch_size filenames per request. In batch mode (real runs
+       only), a single OpenAI batch job is used instead.
+    3. A single writer reports results and applies Plex updates in buffered
+       groups from a worker thread, since plexapi is synchronous.
+
+    Titles previously generated for the same item, path, model, and system
+    prompt are read from the title cache, or failing that the response cache,
+    instead of asking the LLM again.
+    """
+    log.info(f"\nScanning library: {library.title}...")
+    location_prefixes = build_location_prefixes(library.locations)
+
+    log.info("=" * 80)
+
+    loop = asyncio.get_running_loop()
+    read_q: asyncio.Queue[tuple[Any, str] | None] = asyncio.Queue(
+        maxsize=PIPELINE_QUEUE_SIZE
+    )
+    # Entries carry the cache a title was found in ("title" or "response"),
+    # or None if it was just generated
+    write_q: asyncio.Queue[tuple[Any, str, str | Exception, str | None] | None] = (
+        asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    )
+    stats = ProcessStats()
+    cache = open_title_cache()
+    cache_writes = 0
+
+    def lookup_cached_title(item: Any, relative_path: str) -> str | None:
+        if not cache:
+            return None
+        return load_cached_title(
+            cache, item.ratingKey, title_cache_key(config, relative_path)
+        )
+
+    async def read_items() -> None:
+        offset = 0
+        next_page = loop.run_in_executor(
+            None, fetch_classified_page, library, offset, location_prefixes
+        )
+        while next_page:
+            page = await next_page
+            offset += len(page)
+
+            # Fetch the next page while this one moves through the pipeline
+            next_page = None
+            if len(page) == LIBRARY_PAGE_SIZE:
+                next_page = loop.run_in_executor(
+                    None, fetch_classified_page, library, offset, location_prefixes
+                )
+
+            for item, relative_path, locked in page:
+                stats.found += 1
+
+                if relative_path is None:
+                    stats.skipped_no_file += 1
+                    continue
+
+                if locked:
+                    stats.skipped_locked += 1
+                    log.info(f"SKIP (locked): {item.title}")
+                    continue
+
+                await read_q.put((item, relative_path))
+
+    async def generate_titles() -> None:
+        done = False
+        while not done:
+            chunk: list[tuple[Any, str]] = []
+            while len(chunk) < batch_size:
+                entry = await read_q.get()
+                if entry is None:
+                    done = True
+                    break
+
+                item, relative_path = entry
+
+                cached_title = lookup_cached_title(item, relative_path)
+                if cached_title is not None:
+                    await write_q.put((item, relative_path, cached_title, "title"))
+                    continue
+
+                cached_response = load_cached_response(config, relative_path)
+                if cached_response is not None:
+                    await write_q.put(
+                        (item, relative_path, cached_response, "response")
+                    )
+                    continue
+
+                chunk.append(entry)
+
+            if not chunk:
+                continue
+
+            results = await generate_titles_multi(
+                client, config, [relative_path for _, relative_path in chunk]
+            )
+            for (item, relative_path), result in zip(chunk, results):
+                await write_q.put((item, relative_path, result, None))
+
+    async def generate_titles_in_batch() -> None:
+        candidates: list[tuple[Any, str]] = []
+        while (entry := await read_q.get()) is not None:
+            item, relative_path = entry
+
+            cached_title = lookup_cached_title(item, relative_path)
+            if cached_title is not None:
+                await write_q.put((item, relative_path, cached_title, "title"))
+                continue
+
+            cached_response = load_cached_response(config, relative_path)
+            if cached_response is not None:
+                await write_q.put((item, relative_path, cached_response, "response"))
+                continue
+
+            candidates.append(entry)
+
+        if not candidates:
+            return
+
+        results = await generate_titles_batch(client, config, library.key, candidates)
+        for (item, relative_path), result in zip(candidates, results):
+            if not isinstance(result, Exception):
+                save_cached_response(config, relative_path, result)
+            await write_q.put((item, relative_path, result, None))
+
+    # Buffered updates as (item, current title, new title, relative path)
+    pending_edits: list[tuple[Any, str, str, str]] = []
+    applying: asyncio.Task[None] | None = None
+
+    async def apply_edits(edits: list[tuple[Any, str, str, str]]) -> None:
+        failures = await loop.run_in_executor(
+            None,
+            apply_title_edits,
+            library,
+            [(item, new_title) for item, _, new_title, _ in edits],
+        )
+        errors = {item.ratingKey: e for item, e in failures}
+        for item, current_title, new_title, relative_path in edits:
+            if item.ratingKey in errors:
+                log.error(f"ERROR: {current_title}: {errors[item.ratingKey]}")
+                continue
+            log.info(f"UPDATE: '{current_title}' -> '{new_title}'")
+            log.info(f"  Path: {relative_path}")
+        stats.processed += len(edits) - len(failures)
+        stats.errors += len(failures)
+
+    async def flush_edits() -> None:
+        nonlocal applying
+        edits = pending_edits.copy()
+        pending_edits.clear()
+        # Shielded so that updates already handed to Plex are still reported
+        # if the writer is cancelled
+        applying = asyncio.create_task(apply_edits(edits))
+        await asyncio.shield(applying)
+
+    async def write_titles() -> None:
+        nonlocal cache_writes
+        while (entry := await write_q.get()) is not None:
+            item, relative_path, result, cached_in = entry
+            current_title = item.title
+
+            if isinstance(result, Exception):
+                log.error(f"ERROR: {current_title}: {result}")
+                stats.errors += 1
+                continue
+
+            new_title = result
+
+            if cached_in:
+                stats.cached += 1
+            if cached_in != "title" and cache:
+                save_cached_title(
+                    cache,
+                    item.ratingKey,
+                    title_cache_key(config, relative_path),
+                    new_title,
+                )
+                cache_writes += 1
+                if cache_writes % TITLE_CACHE_COMMIT_INTERVAL == 0:
+                    cache.commit()
+
+            if dry_run:
+                log.info(f"DRY RUN: '{current_title}' -> '{new_title}'")
+                log.info(f"  Path: {relative_path}")
+                stats.processed += 1
+                continue
+
+            pending_edits.append((item, current_title, new_title, relative_path))
+            if len(pending_edits) >= EDIT_BATCH_SIZE:
+                await flush_edits()
+
+        if pending_edits:
+            await flush_edits()
+
+    if batch and not dry_run:
+        generators = [asyncio.create_task(generate_titles_in_batch())]
+    else:
+        generators = [
+            asyncio.create_task(generate_titles())
+            for _ in range(config.max_concurrency)
+        ]
+    writer = asyncio.create_task(write_titles())
+
+    async def feed_items() -> None:
+        await read_items()
+        for _ in generators:
+            await read_q.put(None)
+
+    async def finish_generators() -> None:
+        await asyncio.gather(*generators)
+        await write_q.put(None)
+
+    tasks = [
+        asyncio.create_task(feed_items()),
+        *generators,
+        asyncio.create_task(finish_generators()),
+        writer,
+    ]
+
+    try:
+        # Return as soon as any stage fails so the others can't block forever
+        # on a queue that will never be filled or drained
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Apply updates still buffered or in progress if the run stopped early
+        if applying:
+            await applying
+        if pending_edits:
+            await flush_edits()
+
+        if cache:
+            cache.commit()
+            cache.close()
+
+    log.info("=" * 80)
+    log.info("\nSummary:")
+    log.info(f"  Found: {stats.found}")
+    log.info(f"  Processed: {stats.processed}")
+    log.info(f"  Skipped (locked): {stats.skipped_locked}")
+    log.info(f"  Skipped (no file): {stats.skipped_no_file}")
+    log.info(f"  From cache: {stats.cached}")
+    log.info(f"  Errors: {stats.errors}")
 
     if dry_run:
-        print("\nThis was a DRY RUN. No changes were made.")
+        log.info("\nThis was a DRY RUN. No changes were made.")
 
 
 def prompt_run_mode() -> bool:
@@ -385,6 +1407,20 @@ from a YAML config file (default: config.yaml in the script directory).
         help="Path to YAML config file (default: config.yaml)",
     )
 
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Use the OpenAI Batch API for real runs (cheaper, but may take up to 24h)",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of filenames to send to the LLM per request (default: 1)",
+    )
+
     # Direct connection options
     direct_group = parser.add_argument_group("Direct connection")
     direct_group.add_argument("--url", help="Plex server URL")
@@ -397,6 +1433,11 @@ from a YAML config file (default: config.yaml in the script directory).
 
     args = parser.parse_args()
 
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    configure_logging()
+
     try:
         # Load AI config
         config = load_config(args.config)
@@ -406,10 +1447,7 @@ from a YAML config file (default: config.yaml in the script directory).
             sys.exit(1)
 
         # Initialize OpenAI client
-        client = OpenAI(
-            base_url=config.endpoint,
-            api_key=config.api_key,
-        )
+        client = create_openai_client(config)
 
         # Connect to server
         if args.url and args.token:
@@ -431,7 +1469,11 @@ from a YAML config file (default: config.yaml in the script directory).
         dry_run = not prompt_run_mode()
 
         # Process items
-        process_library_items(library, client, config, dry_run)
+        asyncio.run(
+            process_library_items(
+                library, client, config, dry_run, args.batch, args.batch_size
+            )
+        )
 
     except Exception as e:
         print(f"Error: {e}")